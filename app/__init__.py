@@ -4,6 +4,7 @@ from config import Config
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from app.session import RoutingSession
 
 
 app = Flask(__name__)
@@ -12,9 +13,13 @@ app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__fil
 app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
-db = SQLAlchemy(app)
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 migrate = Migrate(app, db)
 login = LoginManager(app)
 login.login_view = "login"
 
-from app import models, routes
\ No newline at end of file
+from app import models, routes, assets, startup, cli
+
+startup.enable_bytecode_cache()
+if app.config['WARMUP_ON_STARTUP'] and not startup.in_cli_command():
+    startup.warmup()
\ No newline at end of file
@@ -0,0 +1,146 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+import zlib
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+from app import app
+
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+}
+
+# filesystem path -> (mtime, content hash)
+_static_hashes = {}
+
+
+def compressible(mimetype):
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+def accepts_gzip():
+    # 'gzip;q=0' is an explicit refusal, so check the quality, not membership
+    return request.accept_encodings['gzip'] > 0
+
+def static_hash(filename):
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+
+    # Avatars are overwritten in place, so the hash is keyed on mtime too
+    mtime = os.path.getmtime(path)
+    cached = _static_hashes.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.md5(f.read()).hexdigest()[:12]
+    _static_hashes[path] = (mtime, digest)
+    return digest
+
+def gzip_variant(filename, digest):
+    cache_dir = app.config['STATIC_GZIP_DIR']
+    gz_name = '{}-{}.gz'.format(digest, os.path.basename(filename))
+    gz_path = os.path.join(cache_dir, gz_name)
+
+    if not os.path.exists(gz_path):
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(safe_join(app.static_folder, filename), 'rb') as f:
+            data = gzip.compress(f.read(), compresslevel=app.config['COMPRESS_LEVEL'])
+        # Unique temp file per writer, so concurrent workers can't truncate each other's output
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, gz_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    return gz_name
+
+
+@app.url_defaults
+def fingerprint_static(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        digest = static_hash(values['filename'])
+        if digest is not None:
+            values['v'] = digest
+
+def serve_static(filename):
+    digest = static_hash(filename)
+    mimetype = mimetypes.guess_type(filename)[0]
+
+    if (digest is not None and compressible(mimetype) and accepts_gzip()
+            and os.path.getsize(safe_join(app.static_folder, filename)) >= app.config['COMPRESS_MIN_SIZE']):
+        response = send_from_directory(app.config['STATIC_GZIP_DIR'], gzip_variant(filename, digest),
+                                       mimetype=mimetype, download_name=os.path.basename(filename))
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.send_static_file(filename)
+
+    # Either representation may be cached for a year, so shared caches must key on the encoding
+    if compressible(mimetype):
+        response.vary.add('Accept-Encoding')
+
+    # Only the fingerprinted URL is safe to cache forever; a stale ?v= falls back to defaults
+    if digest is not None and request.args.get('v') == digest:
+        response.headers['Cache-Control'] = 'public, max-age={}, immutable'.format(app.config['STATIC_MAX_AGE'])
+
+    return response
+
+app.view_functions['static'] = serve_static
+
+def gzip_stream(body, level, flush_size):
+    # Sync-flushing costs a few bytes and resets the encoder's block, so only
+    # do it once flush_size bytes are pending. The first chunk is flushed right
+    # away so the page header still paints first.
+    encoder = zlib.compressobj(level, zlib.DEFLATED, 31)
+    pending = 0
+    first = True
+    try:
+        for chunk in body:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            data = encoder.compress(chunk)
+            pending += len(chunk)
+            if first or pending >= flush_size:
+                data += encoder.flush(zlib.Z_SYNC_FLUSH)
+                pending = 0
+                first = False
+            if data:
+                yield data
+        yield encoder.flush()
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+
+@app.after_request
+def compress_response(response):
+    # File responses are left alone; static files are handled above
+    if (response.direct_passthrough
+            or not 200 <= response.status_code < 300
+            or 'Content-Encoding' in response.headers
+            or not compressible(response.mimetype)
+            or not accepts_gzip()):
+        return response
+
+    if response.is_streamed:
+        response.response = gzip_stream(response.response, app.config['COMPRESS_LEVEL'], app.config['STREAM_BUFFER_SIZE'])
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_LEVEL']))
+
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
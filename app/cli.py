@@ -0,0 +1,146 @@
+import csv
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import click
+import sqlalchemy as sa
+from email_validator import EmailNotValidError, validate_email
+from werkzeug.security import generate_password_hash
+from app import app, db
+from app.models import User
+
+
+REQUIRED_COLUMNS = ('username', 'email', 'password', 'phone', 'qualification')
+
+
+def row_error(row):
+    """Apply the checks RegistrationForm and the user table would, returning the first failure."""
+    empty = [c for c in REQUIRED_COLUMNS if not row.get(c)]
+    if empty:
+        return 'empty ' + ', '.join(empty)
+
+    too_long = [
+        c for c in REQUIRED_COLUMNS
+        if c in User.__table__.c and len(row[c]) > User.__table__.c[c].type.length
+    ]
+    if too_long:
+        return 'too long: ' + ', '.join(
+            '{} (max {})'.format(c, User.__table__.c[c].type.length) for c in too_long
+        )
+
+    try:
+        validate_email(row['email'], check_deliverability=False)
+    except EmailNotValidError as e:
+        return 'invalid email: {}'.format(e)
+    return None
+
+
+def read_rows(path):
+    """Yield (line number, row, error) for every row in the CSV."""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise click.UsageError('missing columns: {}'.format(', '.join(missing)))
+
+        seen = {field: set() for field in User.UNIQUE_FIELDS}
+        for row in reader:
+            row = {k: (v or '').strip() for k, v in row.items() if k}
+            error = row_error(row)
+            duplicate = [f for f in User.UNIQUE_FIELDS if row.get(f) in seen[f]]
+            for field in User.UNIQUE_FIELDS:
+                seen[field].add(row.get(field))
+
+            if error:
+                yield reader.line_num, row, error
+            elif duplicate:
+                yield reader.line_num, row, 'duplicate {} in file'.format(', '.join(duplicate))
+            else:
+                yield reader.line_num, row, None
+
+def insert_batch(batch):
+    """Insert (line, values) pairs, returning {line: error} for the rows that failed."""
+    taken = User.existing_values(
+        username=[v['username'] for _, v in batch],
+        email=[v['email'] for _, v in batch],
+        phone=[v['phone'] for _, v in batch]
+    )
+    errors = {}
+    pending = []
+    for line, values in batch:
+        clash = [f for f in User.UNIQUE_FIELDS if values[f] in taken[f]]
+        if clash:
+            errors[line] = '{} already registered'.format(', '.join(clash))
+        else:
+            pending.append((line, values))
+
+    if not pending:
+        return errors
+    try:
+        db.session.execute(sa.insert(User), [values for _, values in pending])
+        db.session.commit()
+    except sa.exc.IntegrityError:
+        # Someone registered concurrently; fall back to row-by-row to find out who
+        db.session.rollback()
+        for line, values in pending:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(sa.insert(User), [values])
+            except sa.exc.IntegrityError as e:
+                errors[line] = '{} already registered'.format(User.violated_field(e) or 'user')
+        db.session.commit()
+    return errors
+
+def flush_batch(batch, report, workers):
+    """Insert the valid rows of a batch and report every row in CSV line order."""
+    errors = {line: error for line, _, error in batch if error}
+    valid = [(line, row) for line, row, error in batch if not error]
+
+    hashes = workers.map(generate_password_hash, [row['password'] for _, row in valid], chunksize=64)
+    values = []
+    for (line, row), password_hash in zip(valid, hashes):
+        values.append((line, {
+            'username': row['username'],
+            'email': row['email'],
+            'phone': row['phone'],
+            'qualification': row['qualification'],
+            'is_admin': row.get('is_admin', '').lower() in ('1', 'true', 'yes'),
+            'password_hash': password_hash,
+        }))
+    if values:
+        errors.update(insert_batch(values))
+
+    for line, row, _ in sorted(batch, key=lambda item: item[0]):
+        report.writerow([line, row.get('username', ''), 'error' if line in errors else 'created', errors.get(line, '')])
+    return len(batch) - len(errors), len(errors)
+
+@app.cli.command('provision-users')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=1000, show_default=True, help='Rows inserted per transaction.')
+@click.option('--workers', default=None, type=int, help='Password hashing processes (default: CPU count).')
+@click.option('--report', 'report_path', type=click.Path(dir_okay=False, writable=True),
+              help='Write the per-row report here instead of stdout.')
+def provision_users(csv_path, batch_size, workers, report_path):
+    """Create users in bulk from a CSV of username,email,password,phone,qualification[,is_admin]."""
+    out = open(report_path, 'w', newline='') if report_path else sys.stdout
+    report = csv.writer(out)
+    report.writerow(['line', 'username', 'status', 'error'])
+
+    created = failed = 0
+    batch = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Rows that fail validation wait in the batch too, so the report keeps CSV order
+            for line, row, error in read_rows(csv_path):
+                batch.append((line, row, error))
+                if len(batch) >= batch_size:
+                    ok, bad = flush_batch(batch, report, pool)
+                    created, failed = created + ok, failed + bad
+                    batch = []
+            if batch:
+                ok, bad = flush_batch(batch, report, pool)
+                created, failed = created + ok, failed + bad
+    finally:
+        if report_path:
+            out.close()
+
+    click.echo('{} created, {} failed'.format(created, failed), err=True)
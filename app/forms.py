@@ -37,19 +37,32 @@ class RegistrationForm(FlaskForm):
     qualification = StringField("qualification",validators=[DataRequired()])
     submit = SubmitField("Register")
 
-    def validate_username(self, username):
-        user = db.session.scalar(sa.select(User).where(
-            User.username == username.data
-        ))
-        if user is not None:
-            raise ValidationError("Please use a different username")
-        
-    def validate_email(self, email):
-        user = db.session.scalar(sa.select(User).where(
-            User.email == email.data
-        ))
-        if user is not None:
-            raise ValidationError("Please use a different email address")
+    unique_messages = {
+        'username': "Please use a different username",
+        'email': "Please use a different email address",
+        'phone': "Please use a different phone number",
+    }
+
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+
+        taken = User.existing_values(
+            username=[self.username.data],
+            email=[self.email.data],
+            phone=[self.phone.data]
+        )
+        for field in User.UNIQUE_FIELDS:
+            if self[field].data in taken[field]:
+                self.add_unique_error(field)
+        return not self.errors
+
+    def add_unique_error(self, field):
+        if field is None:
+            # Couldn't tell which constraint fired, so don't blame a field that may be fine
+            self.form_errors.append("An account with these details already exists")
+        else:
+            self[field].errors.append(self.unique_messages[field])
 
 class ProfileForm(FlaskForm):
     phone = StringField("Phone", validators=[DataRequired(), Length(min=10, max=15)])
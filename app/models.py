@@ -24,6 +24,32 @@ class User(UserMixin, db.Model):
     is_admin: so.Mapped[bool] = so.mapped_column(sa.Boolean, default=False)
     avatar: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256), nullable=True)
     
+    UNIQUE_FIELDS = ('username', 'email', 'phone')
+
+    @classmethod
+    def existing_values(cls, username=(), email=(), phone=()):
+        """Look up which of the given usernames, emails and phones are taken, in one query."""
+        rows = db.session.execute(sa.select(cls.username, cls.email, cls.phone).where(sa.or_(
+            cls.username.in_(list(username)),
+            cls.email.in_(list(email)),
+            cls.phone.in_(list(phone))
+        )))
+        taken = {field: set() for field in cls.UNIQUE_FIELDS}
+        for row in rows:
+            for field in cls.UNIQUE_FIELDS:
+                taken[field].add(getattr(row, field))
+        return taken
+
+    @classmethod
+    def violated_field(cls, error):
+        """Map a unique-constraint IntegrityError to the offending column, if it can be told."""
+        message = str(error.orig)
+        for field in cls.UNIQUE_FIELDS:
+            # sqlite: "user.phone", postgres/mysql: "ix_user_phone" or "(phone)="
+            if 'user.' + field in message or 'user_' + field in message or '(' + field + ')' in message:
+                return field
+        return None
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -0,0 +1,40 @@
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+from app.models import User, Course, CoursePrerequisite, Group, GroupPrerequisite, Subject
+
+
+# Statements used by the routes and replayed by the startup warmup, kept in one
+# place so the warmed cache entries always match what the routes execute.
+
+def user_by_username(username):
+    return sa.select(User).where(User.username == username)
+
+def all_courses():
+    return sa.select(Course)
+
+def course_by_id(course_id):
+    return sa.select(Course).where(Course.id == course_id)
+
+def course_details(course_id):
+    return course_by_id(course_id).options(
+        so.selectinload(Course.course_prerequisites).selectinload(CoursePrerequisite.prerequisite_course)
+    )
+
+def groups_in_course(course_id):
+    return sa.select(Group).where(Group.course_group_id == course_id)
+
+def course_group_details(course_id):
+    return groups_in_course(course_id).options(
+        so.selectinload(Group.group_prerequisites).selectinload(GroupPrerequisite.prerequisite_group)
+    )
+
+def group_in_course(course_id, group_id):
+    return sa.select(Group).where(Group.id == group_id, Group.course_group_id == course_id)
+
+def group_details(course_id, group_id):
+    return group_in_course(course_id, group_id).options(
+        so.selectinload(Group.group_prerequisites).selectinload(GroupPrerequisite.prerequisite_group)
+    )
+
+def subjects_in_group(group_id):
+    return sa.select(Subject).where(Subject.subject_group_id == group_id)
@@ -1,14 +1,63 @@
 import os
 from urllib.parse import urlsplit
-from flask import Flask, render_template, flash, redirect, url_for, request
+from flask import Flask, render_template, stream_template, flash, redirect, url_for, request, get_flashed_messages
 from flask_login import current_user, login_user, logout_user, login_required
 from werkzeug.utils import secure_filename
 import sqlalchemy as sa
-from app import db, app
+from app import db, app, queries
 from app.models import User, Group, GroupPrerequisite, Course, CoursePrerequisite, Subject
 from app.forms import LoginForm, RegistrationForm, ProfileForm, GroupForm,FlaskForm,CourseForm, SubjectForm
 
 
+def render_page(template, **context):
+    # Large detail pages are streamed so the header reaches the browser before
+    # the row loop finishes. The request's db.session is removed at teardown,
+    # before a streamed body is generated, so everything the template touches
+    # must be loaded up front except the chunked() rows. Flashed messages and
+    # the current user are resolved here for the same reason, and because the
+    # session cookie is written before the body.
+    if not app.config['STREAM_TEMPLATES']:
+        return render_template(template, **context)
+    get_flashed_messages()
+    current_user._get_current_object()
+    return app.response_class(buffered(stream_template(template, **context)))
+
+def buffered(fragments):
+    # Jinja yields a fragment per tag or expression, tens of bytes each, so
+    # join them into STREAM_BUFFER_SIZE writes. The first write goes out at
+    # STREAM_HEADER_SIZE so the page header still paints before the rows.
+    chunk, size, limit = [], 0, app.config['STREAM_HEADER_SIZE']
+    try:
+        for fragment in fragments:
+            chunk.append(fragment)
+            size += len(fragment)
+            if size >= limit:
+                yield ''.join(chunk)
+                chunk, size, limit = [], 0, app.config['STREAM_BUFFER_SIZE']
+        if chunk:
+            yield ''.join(chunk)
+    finally:
+        # Lets stream_with_context pop the request context if the client goes away
+        fragments.close()
+
+def chunked(stmt):
+    # Runs on its own session so the rows can still be fetched after teardown
+    # has removed db.session, and closes it once the template has iterated.
+    session = db.session.session_factory()
+    try:
+        if db.engine.dialect.name == 'sqlite':
+            # An open SQLite cursor holds a read lock that blocks commits for as
+            # long as a slow client downloads, so fetch everything and release
+            # it. This means memory is NOT bounded by QUERY_CHUNK_SIZE on SQLite;
+            # only the response is streamed.
+            rows = session.scalars(stmt).all()
+            session.close()
+            yield from rows
+        else:
+            yield from session.scalars(stmt.execution_options(yield_per=app.config['QUERY_CHUNK_SIZE']))
+    finally:
+        session.close()
+
 @app.route('/')
 @app.route('/index')
 @login_required
@@ -22,7 +71,7 @@ def login():
     
     form = LoginForm()
     if form.validate_on_submit():
-        user = db.session.scalar(sa.select(User).where(User.username == form.username.data))
+        user = db.session.scalar(queries.user_by_username(form.username.data))
         
         if user is None or not user.check_password(form.password.data):
             flash("Invalid username or password")
@@ -54,7 +103,13 @@ def register():
         user = User(username=form.username.data, email=form.email.data, phone=form.phone.data, qualification=form.qualification.data)
         user.set_password(form.password.data)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except sa.exc.IntegrityError as e:
+            # Lost a race with another registration between validate and insert
+            db.session.rollback()
+            form.add_unique_error(User.violated_field(e))
+            return render_template('register.html', title='Register', form=form)
         flash('Congratulations, you are now a registered user!')
         return redirect(url_for('login'))
     
@@ -63,13 +118,13 @@ def register():
 @app.route('/user/<username>')
 @login_required
 def user(username):
-    user = db.session.scalar(sa.select(User).where(User.username == username))
+    user = db.session.scalar(queries.user_by_username(username))
     return render_template('user.html', user=user)
 
 @app.route("/user/<username>/edit", methods=["GET", "POST"])
 @login_required
 def profile(username):
-    user = db.session.scalar(sa.select(User).where(User.username == username))
+    user = db.session.scalar(queries.user_by_username(username))
 
     if user != current_user and not current_user.is_admin:
         flash('You do not have permission to edit this profile.', 'danger')
@@ -104,7 +159,7 @@ def profile(username):
 
 @app.route('/courses', methods=['GET', 'POST'])
 def get_courses():
-    courses = db.session.scalars(sa.select(Course)).all()
+    courses = db.session.scalars(queries.all_courses()).all()
     return render_template('courses_list.html', courses=courses)
 
 @app.route('/courses/create', methods=['GET', 'POST'])
@@ -134,9 +189,9 @@ def create_course():
 
 @app.route("/courses/<int:course_id>", methods=["GET"])
 def view_course(course_id):
-    course = db.first_or_404(sa.select(Course).where(Course.id == course_id))
-    groups = db.session.scalars(sa.select(Group).where(Group.course_group_id == course_id))
-    return render_template('course_details.html', course=course, groups=groups)
+    course = db.first_or_404(queries.course_details(course_id))
+    groups = chunked(queries.course_group_details(course_id))
+    return render_page('course_details.html', course=course, groups=groups)
 
 @app.route("/courses/<int:course_id>/edit", methods=["GET", "POST"])
 @login_required
@@ -144,7 +199,7 @@ def edit_course(course_id):
     if not current_user.is_admin:
         return redirect(url_for('get_courses'))
     
-    course = db.session.scalar(sa.select(Course).where(Course.id == course_id))
+    course = db.session.scalar(queries.course_by_id(course_id))
     form = CourseForm(obj=course)
 
     form.course_prerequisites.choices = [(course.id, course.name) for course in Course.query.all()]
@@ -175,12 +230,12 @@ def delete_course(course_id):
     if not current_user.is_admin:
         return redirect(url_for('get_courses'))
     
-    course = db.first_or_404(sa.select(Course).where(Course.id == course_id))
+    course = db.first_or_404(queries.course_by_id(course_id))
 
     for prerequisite in course.course_prerequisites:
         db.session.delete(prerequisite)
     
-    groups = db.session.scalars(sa.select(Group).where(Group.course_group_id == course_id)).all()
+    groups = db.session.scalars(queries.groups_in_course(course_id)).all()
     for group in groups:
         for prerequisite in group.group_prerequisites:
             db.session.delete(prerequisite)
@@ -194,8 +249,8 @@ def delete_course(course_id):
 
 @app.route('/courses/<int:course_id>/groups', methods=['GET', 'POST'])
 def get_groups(course_id):
-    course = db.first_or_404(sa.select(Course).where(Course.id == course_id))
-    groups = db.session.scalars(sa.select(Group).where(Group.course_group_id == course_id)).all()
+    course = db.first_or_404(queries.course_by_id(course_id))
+    groups = db.session.scalars(queries.groups_in_course(course_id)).all()
     return render_template('groups_list.html', course=course, groups=groups)
 
 @app.route('/courses/<int:course_id>/groups/create', methods=['GET', 'POST'])
@@ -204,7 +259,7 @@ def create_group(course_id):
     if not current_user.is_admin:
         return redirect(url_for('get_groups', course_id=course_id))
     
-    course = db.first_or_404(sa.select(Course).where(Course.id == course_id))
+    course = db.first_or_404(queries.course_by_id(course_id))
     form = GroupForm()
     
     # Populate the group_prerequisites field with existing groups
@@ -233,8 +288,8 @@ def create_group(course_id):
 @app.route("/courses/<int:course_id>/groups/<int:group_id>", methods=["GET", "POST"])
 @login_required
 def view_group(course_id, group_id):
-    group = db.first_or_404(sa.select(Group).where(Group.id==group_id, Group.course_group_id==course_id))
-    subjects = db.session.scalars(sa.select(Subject).where(Subject.subject_group_id==group_id))
+    group = db.first_or_404(queries.group_details(course_id, group_id))
+    subjects = chunked(queries.subjects_in_group(group_id))
     
     form = SubjectForm()
     if not current_user.is_anonymous and current_user.is_admin:
@@ -247,7 +302,7 @@ def view_group(course_id, group_id):
             db.session.add(new_subject)
             db.session.commit()
             return redirect(url_for("view_group", course_id=course_id, group_id=group_id))
-    return render_template('group_details.html', form=form, group=group, subjects=subjects)
+    return render_page('group_details.html', form=form, group=group, subjects=subjects)
 
 @app.route("/course/<int:course_id>/groups/<int:group_id>/edit", methods=["GET", "POST"])
 @login_required
@@ -255,7 +310,7 @@ def edit_group(course_id, group_id):
     if not current_user.is_admin:
         return redirect(url_for('get_groups', course_id=course_id))
     
-    group = db.first_or_404(sa.select(Group).where(Group.id == group_id, Group.course_group_id == course_id))
+    group = db.first_or_404(queries.group_in_course(course_id, group_id))
     form = GroupForm(obj=group)
 
     # Populate the group_prerequisites field with existing groups
@@ -286,7 +341,7 @@ def delete_group(course_id, group_id):
     if not current_user.is_admin:
         return redirect(url_for('get_groups', course_id=course_id))
     
-    group = db.first_or_404(sa.select(Group).where(Group.id == group_id, Group.course_group_id == course_id))
+    group = db.first_or_404(queries.group_in_course(course_id, group_id))
     for prerequisite in group.group_prerequisites:
         db.session.delete(prerequisite)
 
@@ -0,0 +1,37 @@
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+READ_METHODS = {'GET', 'HEAD'}
+
+
+class RoutingSession(Session):
+    """Sends reads from GET requests to the 'replica' bind when one is configured.
+
+    Writes, non-GET requests, anything after a flush in the same request and,
+    for REPLICA_LAG_SECONDS after a write, every request from that user stay on
+    the primary so nobody reads back stale data of their own.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica():
+            replica = self._db.engines.get('replica')
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self):
+        if self._flushing or not has_request_context():
+            return False
+        if request.method not in READ_METHODS or g.get('db_wrote'):
+            return False
+        return session.get('_primary_until', 0) < time.time()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def stick_to_primary(db_session, flush_context):
+    if has_request_context() and 'replica' in db_session._db.engines:
+        g.db_wrote = True
+        session['_primary_until'] = time.time() + current_app.config['REPLICA_LAG_SECONDS']
@@ -0,0 +1,103 @@
+import logging
+import os
+import time
+import click
+import sqlalchemy as sa
+from jinja2 import FileSystemBytecodeCache
+from app import app, db, queries
+from app.models import User
+
+
+# app.logger only shows warnings outside debug mode, so the startup metric gets
+# its own INFO-level logger that every worker writes to stderr.
+metrics = logging.getLogger('what_next.startup')
+metrics.setLevel(logging.INFO)
+metrics.propagate = False
+if not metrics.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('[%(asctime)s] %(process)d %(name)s: %(message)s'))
+    metrics.addHandler(handler)
+
+
+# The statements the routes run, built from the same helpers so the warmed
+# cache entries can't drift from app/routes.py. The ids are placeholders that
+# match no rows, and each query is read with yield_per=1 and .first(), so even
+# the unfiltered all_courses() fetches at most one row.
+def hot_queries():
+    return [
+        queries.user_by_username(''),
+        queries.all_courses(),
+        queries.course_by_id(0),
+        queries.course_details(0),
+        queries.groups_in_course(0),
+        queries.course_group_details(0),
+        queries.group_in_course(0, 0),
+        queries.group_details(0, 0),
+        queries.subjects_in_group(0),
+    ]
+
+def enable_bytecode_cache():
+    cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+def warm_templates():
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+def warm_queries():
+    """Run the hot queries once per engine and return how many actually ran."""
+    ran = 0
+    with app.app_context():
+        # Outside a request every query routes to the primary, so GET traffic's
+        # replica engine has to be named explicitly to get its cache filled
+        engines = [db.engine]
+        if 'replica' in db.engines:
+            engines.append(db.engines['replica'])
+        try:
+            for engine in engines:
+                bind = {'bind': engine}
+                for stmt in hot_queries():
+                    db.session.scalars(stmt.execution_options(yield_per=1), bind_arguments=bind).first()
+                    ran += 1
+                db.session.get(User, 0, bind_arguments=bind)
+                ran += 1
+        except sa.exc.SQLAlchemyError as e:
+            # e.g. tables not created yet on a fresh database
+            app.logger.warning('Skipping query warmup: %s', e)
+        finally:
+            db.session.rollback()
+            # Don't leave pooled connections behind for forked workers to inherit;
+            # each engine keeps its compiled cache across dispose()
+            for engine in engines:
+                engine.dispose()
+    return ran
+
+def in_cli_command():
+    """True when the app is being imported by a `flask` command.
+
+    Commands like `db upgrade` or `provision-users` don't serve requests, so
+    warming them up only costs time; `flask warmup` runs it on demand.
+    """
+    return os.environ.get('FLASK_RUN_FROM_CLI') == 'true'
+
+def warmup():
+    start = time.perf_counter()
+    templates = warm_templates()
+    ran = warm_queries()
+    elapsed = time.perf_counter() - start
+
+    app.config['WARMUP_SECONDS'] = elapsed
+    metrics.info('startup warmup: %d templates, %d queries in %.3fs', templates, ran, elapsed)
+    return elapsed
+
+@app.cli.command('warmup')
+def warmup_command():
+    """Print how long the startup warmup took, running it if it was skipped."""
+    elapsed = app.config.get('WARMUP_SECONDS')
+    if elapsed is None:
+        elapsed = warmup()
+    click.echo('{:.3f}'.format(elapsed))
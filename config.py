@@ -3,4 +3,21 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'Some-random-secret-key-that-you-will-never-guess'
-    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///"+os.path.join(basedir, 'site.db')
\ No newline at end of file
+    SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///"+os.path.join(basedir, 'site.db')
+    # e.g. a copy of site.db: sqlite:///replica.db
+    REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_LAG_SECONDS = float(os.environ.get('REPLICA_LAG_SECONDS') or 5)
+    STREAM_TEMPLATES = os.environ.get('STREAM_TEMPLATES', '1') == '1'
+    STREAM_HEADER_SIZE = int(os.environ.get('STREAM_HEADER_SIZE') or 1024)
+    STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE') or 8192)
+    # Rows per fetch on streamed pages. SQLite ignores this and loads all rows,
+    # since an open cursor would block writers, so memory is only bounded on
+    # server databases.
+    QUERY_CHUNK_SIZE = int(os.environ.get('QUERY_CHUNK_SIZE') or 100)
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 500)
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL') or 6)
+    STATIC_GZIP_DIR = os.environ.get('STATIC_GZIP_DIR') or os.path.join(basedir, '.cache', 'static-gz')
+    STATIC_MAX_AGE = 365 * 24 * 60 * 60
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(basedir, '.cache', 'jinja')
+    WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', '1') == '1'
\ No newline at end of file